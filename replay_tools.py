@@ -4,7 +4,7 @@ ReplayToolkit: PNGb Caesar decode + .vtr parsing + 2D map rendering.
 Dependencies:
   pip install lz4 pillow numpy
 Optional:
-  pip install scipy
+  pip install scipy numba orjson
 """
 
 from __future__ import annotations
@@ -12,10 +12,22 @@ from __future__ import annotations
 import dataclasses
 import io
 import json
+import operator
 import struct
+from collections import OrderedDict
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    ClassVar,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
 
 import lz4.frame
 from lz4.block import LZ4BlockError, decompress as lz4_block_decompress
@@ -27,8 +39,103 @@ try:
 except Exception:
     gaussian_filter = None
 
+try:
+    from scipy.signal import fftconvolve
+except Exception:
+    fftconvolve = None
+
+try:
+    from numba import njit, prange
+except Exception:
+    njit = None
+    prange = range
+
+try:
+    import orjson
+except Exception:
+    orjson = None
+
 
 LZ4FrameError = getattr(lz4.frame, "LZ4FrameError", RuntimeError)
+LZ4_FRAME_MAGIC = b"\x04\x22\x4d\x18"
+# Upper bound accepted for a block's uint32 uncompressed-size prefix.
+_LZ4_BLOCK_MAX_SIZE = 1 << 30
+
+# Above this sigma an FFT blur beats gaussian_filter's direct convolution.
+_FFT_BLUR_MIN_SIGMA = 8.0
+
+# Decoded heightmaps keyed by (path, mtime_ns, smooth_sigma), least recent first.
+_HEIGHTMAP_CACHE: "OrderedDict[Tuple[str, int, float], np.ndarray]" = OrderedDict()
+_HEIGHTMAP_CACHE_SIZE = 4
+
+_S_I32 = struct.Struct("<i")
+_S_U32 = struct.Struct("<I")
+_S_F32 = struct.Struct("<f")
+_S_U8 = struct.Struct("<B")
+_S_VEC3 = struct.Struct("<fff")
+
+_KF_FULL = struct.Struct("<fffffffi")
+_KF_WORLD_EVENT = struct.Struct("<fBfffi")
+_KF_BULLET_EVENT = struct.Struct("<fBfffffffiB")
+_KF_BULLET_END = struct.Struct("<fBi")
+_KF_RADAR_LOCK = struct.Struct("<fi")
+_KF_RADAR_JAMMER = struct.Struct("<fBBBfff")
+_KF_POOLED_PROJECTILE = struct.Struct("<fBffffff")
+
+
+def _motion_delta_dtype(flags: int) -> np.dtype:
+    fields: List[Tuple[Any, ...]] = [("dt", "<f4"), ("flags", "u1")]
+    if flags & 0b001:
+        fields.append(("position", "<f4", (3,)))
+    if flags & 0b010:
+        fields.append(("velocity", "<f4", (3,)))
+    if flags & 0b100:
+        fields.append(("rotation", "<i4"))
+    return np.dtype(fields)
+
+
+# Packed record layout of a delta keyframe, indexed by its flag bits.
+_MOTION_DELTA_DTYPES = [_motion_delta_dtype(flags) for flags in range(8)]
+
+# Zero deltas for the components a delta keyframe leaves out.
+_MOTION_DELTA_PAD = (0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0)
+
+
+def _motion_delta_reader(
+    flags: int,
+) -> Tuple[struct.Struct, Callable[[Tuple[Any, ...]], Tuple[Any, ...]]]:
+    """
+    Struct for a whole delta keyframe with these flags, and a getter mapping
+    its values + _MOTION_DELTA_PAD to (dt, dpx, dpy, dpz, dvx, dvy, dvz, drot).
+    """
+    fmt = "<fB"
+    picks = [0]
+    pad = 2 + 3 * bool(flags & 0b001) + 3 * bool(flags & 0b010) + bool(flags & 0b100)
+    field = 2
+    for bit, code, width, pad_at in (
+        (0b001, "f", 3, pad),
+        (0b010, "f", 3, pad + 3),
+        (0b100, "i", 1, pad + 6),
+    ):
+        if flags & bit:
+            fmt += code * width
+            picks.extend(range(field, field + width))
+            field += width
+        else:
+            picks.extend(range(pad_at, pad_at + width))
+    return struct.Struct(fmt), operator.itemgetter(*picks)
+
+
+_MOTION_DELTA_READERS = [_motion_delta_reader(flags) for flags in range(8)]
+
+
+def _read_motion_delta(reader: BufferReader) -> Tuple[Any, ...]:
+    """Read one delta keyframe as (dt, dpx, dpy, dpz, dvx, dvy, dvz, drot)."""
+    if not reader.ensure(5):
+        raise EOFError("Read past end of buffer")
+    flags = reader._buffer[reader._offset + 4]
+    packer, expand = _MOTION_DELTA_READERS[flags & 0b111]
+    return expand(reader.unpack_struct(packer) + _MOTION_DELTA_PAD)
 
 
 class BufferReader:
@@ -42,10 +149,18 @@ class BufferReader:
     def offset(self) -> int:
         return self._offset
 
+    def ensure(self, length: int) -> bool:
+        """
+        Return whether ``length`` bytes are available at the current offset.
+        Callers that index ``_buffer`` directly must call this first; streaming
+        readers may replace ``_buffer`` and rebase ``_offset`` while refilling.
+        """
+        return self._offset + length <= len(self._buffer)
+
     def read_bytes(self, length: int) -> bytes:
-        end = self._offset + length
-        if end > len(self._buffer):
+        if not self.ensure(length):
             raise EOFError("Read past end of buffer")
+        end = self._offset + length
         chunk = self._buffer[self._offset : end].tobytes()
         self._offset = end
         return chunk
@@ -54,31 +169,52 @@ class BufferReader:
         size = struct.calcsize(fmt)
         return struct.unpack(fmt, self.read_bytes(size))
 
+    def unpack_struct(self, packer: struct.Struct) -> Tuple[Any, ...]:
+        try:
+            values = packer.unpack_from(self._buffer, self._offset)
+        except struct.error:
+            if not self.ensure(packer.size):
+                raise EOFError("Read past end of buffer") from None
+            values = packer.unpack_from(self._buffer, self._offset)
+        self._offset += packer.size
+        return values
+
     def read_int32(self) -> int:
-        (value,) = self.read_struct("<i")
+        (value,) = self.unpack_struct(_S_I32)
         return value
 
     def read_uint32(self) -> int:
-        (value,) = self.read_struct("<I")
+        (value,) = self.unpack_struct(_S_U32)
         return value
 
     def read_float32(self) -> float:
-        (value,) = self.read_struct("<f")
+        (value,) = self.unpack_struct(_S_F32)
         return value
 
     def read_byte(self) -> int:
-        (value,) = self.read_struct("<B")
+        (value,) = self.unpack_struct(_S_U8)
         return value
 
     def read_bool(self) -> bool:
         return self.read_byte() != 0
 
     def read_vector3(self) -> Tuple[float, float, float]:
-        return (self.read_float32(), self.read_float32(), self.read_float32())
+        return self.unpack_struct(_S_VEC3)
 
     def read_fixed_point(self) -> Tuple[float, float, float]:
         return self.read_vector3()
 
+    def read_records(self, dtype: np.dtype, count: int) -> np.ndarray:
+        """Read ``count`` packed records of a structured dtype into a new array."""
+        count = max(count, 0)
+        if not self.ensure(dtype.itemsize * count):
+            raise EOFError("Read past end of buffer")
+        records = np.frombuffer(
+            self._buffer, dtype=dtype, count=count, offset=self._offset
+        ).copy()
+        self._offset += dtype.itemsize * count
+        return records
+
     def read_string(self) -> str:
         length = self.read_int32()
         if length < 0:
@@ -87,6 +223,41 @@ class BufferReader:
         return data.decode("utf-8")
 
 
+class StreamBufferReader(BufferReader):
+    """
+    BufferReader over a binary stream. Only a sliding window of the stream is
+    kept in memory; it is compacted and refilled in ``chunk_size`` reads.
+    """
+
+    def __init__(self, stream: BinaryIO, *, chunk_size: int = 1 << 16) -> None:
+        super().__init__(b"")
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._window = bytearray()
+        self._discarded = 0
+
+    @property
+    def offset(self) -> int:
+        return self._discarded + self._offset
+
+    def ensure(self, length: int) -> bool:
+        wanted = self._offset + length
+        if wanted <= len(self._window):
+            return True
+        # The window can only be resized once no memoryview exports it.
+        self._buffer.release()
+        del self._window[: self._offset]
+        self._discarded += self._offset
+        self._offset = 0
+        while len(self._window) < length:
+            chunk = self._stream.read(max(self._chunk_size, length - len(self._window)))
+            if not chunk:
+                break
+            self._window += chunk
+        self._buffer = memoryview(self._window)
+        return len(self._window) >= length
+
+
 @dataclass
 class TrackMetadata:
     identity: int
@@ -95,9 +266,7 @@ class TrackMetadata:
     @classmethod
     def from_reader(cls, reader: BufferReader) -> "TrackMetadata":
         identity = reader.read_int32()
-        byte_len = reader.read_int32()
-        raw = [reader.read_byte() for _ in range(byte_len)]
-        label = bytes(raw).decode("utf-8")
+        label = reader.read_string()
         return cls(identity=identity, label=label)
 
 
@@ -110,33 +279,24 @@ class MotionKeyframe:
 
     @classmethod
     def full(cls, reader: BufferReader) -> "MotionKeyframe":
-        t = reader.read_float32()
-        position = reader.read_fixed_point()
-        velocity = reader.read_vector3()
-        rotation = reader.read_int32()
-        return cls(t=t, position=position, velocity=velocity, rotation_int=rotation)
+        t, px, py, pz, vx, vy, vz, rotation = reader.unpack_struct(_KF_FULL)
+        return cls(
+            t=t, position=(px, py, pz), velocity=(vx, vy, vz), rotation_int=rotation
+        )
 
     @classmethod
     def delta(
         cls, reader: BufferReader, previous: "MotionKeyframe"
     ) -> "MotionKeyframe":
-        t = previous.t + reader.read_float32()
-        flags = reader.read_byte()
-
-        pos = list(previous.position)
-        vel = list(previous.velocity)
-        rot = previous.rotation_int
-
-        if flags & 0b001:
-            delta_pos = reader.read_vector3()
-            pos = [p + d for p, d in zip(pos, delta_pos)]
-        if flags & 0b010:
-            delta_vel = reader.read_vector3()
-            vel = [v + d for v, d in zip(vel, delta_vel)]
-        if flags & 0b100:
-            rot += reader.read_int32()
-
-        return cls(t=t, position=tuple(pos), velocity=tuple(vel), rotation_int=rot)
+        dt, dpx, dpy, dpz, dvx, dvy, dvz, drot = _read_motion_delta(reader)
+        px, py, pz = previous.position
+        vx, vy, vz = previous.velocity
+        return cls(
+            t=previous.t + dt,
+            position=(px + dpx, py + dpy, pz + dpz),
+            velocity=(vx + dvx, vy + dvy, vz + dvz),
+            rotation_int=previous.rotation_int + drot,
+        )
 
 
 @dataclass
@@ -158,13 +318,11 @@ class WorldEventKeyframe(EventKeyframe):
 
     @classmethod
     def from_reader(cls, reader: BufferReader) -> "WorldEventKeyframe":
-        base = EventKeyframe.from_reader(reader)
-        position = reader.read_fixed_point()
-        rotation = reader.read_int32()
+        t, event_type, px, py, pz, rotation = reader.unpack_struct(_KF_WORLD_EVENT)
         return cls(
-            t=base.t,
-            event_type=base.event_type,
-            position=position,
+            t=t,
+            event_type=event_type,
+            position=(px, py, pz),
             rotation_int=rotation,
         )
 
@@ -179,20 +337,27 @@ class BulletEventKeyframe(EventKeyframe):
 
     @classmethod
     def from_reader(cls, reader: BufferReader) -> "BulletEventKeyframe":
-        base = EventKeyframe.from_reader(reader)
-        position = reader.read_fixed_point()
-        velocity = reader.read_vector3()
-        mass = reader.read_float32()
-        bullet_id = reader.read_int32()
-        lifetime = float(reader.read_byte())
+        (
+            t,
+            event_type,
+            px,
+            py,
+            pz,
+            vx,
+            vy,
+            vz,
+            mass,
+            bullet_id,
+            lifetime,
+        ) = reader.unpack_struct(_KF_BULLET_EVENT)
         return cls(
-            t=base.t,
-            event_type=base.event_type,
-            position=position,
-            velocity=velocity,
+            t=t,
+            event_type=event_type,
+            position=(px, py, pz),
+            velocity=(vx, vy, vz),
             mass=mass,
             bullet_id=bullet_id,
-            lifetime=lifetime,
+            lifetime=float(lifetime),
         )
 
 
@@ -202,9 +367,8 @@ class BulletEndKeyframe(EventKeyframe):
 
     @classmethod
     def from_reader(cls, reader: BufferReader) -> "BulletEndKeyframe":
-        base = EventKeyframe.from_reader(reader)
-        bullet_id = reader.read_int32()
-        return cls(t=base.t, event_type=base.event_type, bullet_id=bullet_id)
+        t, event_type, bullet_id = reader.unpack_struct(_KF_BULLET_END)
+        return cls(t=t, event_type=event_type, bullet_id=bullet_id)
 
 
 EVENT_TYPE_MAP = {
@@ -221,10 +385,16 @@ class RadarLockKeyframe:
     t: float
     target_id: int
 
+    record_dtype: ClassVar[np.dtype] = np.dtype([("t", "<f4"), ("target_id", "<i4")])
+
     @classmethod
     def from_reader(cls, reader: BufferReader) -> "RadarLockKeyframe":
-        t = reader.read_float32()
-        target_id = reader.read_int32()
+        t, target_id = reader.unpack_struct(_KF_RADAR_LOCK)
+        return cls(t=t, target_id=target_id)
+
+    @classmethod
+    def from_record(cls, record: Tuple[Any, ...]) -> "RadarLockKeyframe":
+        t, target_id = record
         return cls(t=t, target_id=target_id)
 
 
@@ -248,17 +418,15 @@ class RadarJammerKeyframe:
 
     @classmethod
     def from_reader(cls, reader: BufferReader) -> "RadarJammerKeyframe":
-        t = reader.read_float32()
-        keyframe_type = reader.read_byte()
-        transmit_mode = reader.read_byte()
-        band = reader.read_byte()
-        direction = reader.read_vector3()
+        t, keyframe_type, transmit_mode, band, dx, dy, dz = reader.unpack_struct(
+            _KF_RADAR_JAMMER
+        )
         return cls(
             t=t,
             keyframe_type=keyframe_type,
             transmit_mode=transmit_mode,
             band=band,
-            direction=direction,
+            direction=(dx, dy, dz),
         )
 
 
@@ -279,13 +447,33 @@ class PooledProjectileKeyframe:
     position: Tuple[float, float, float]
     velocity: Tuple[float, float, float]
 
+    record_dtype: ClassVar[np.dtype] = np.dtype(
+        [
+            ("t", "<f4"),
+            ("active", "u1"),
+            ("position", "<f4", (3,)),
+            ("velocity", "<f4", (3,)),
+        ]
+    )
+
     @classmethod
     def from_reader(cls, reader: BufferReader) -> "PooledProjectileKeyframe":
-        t = reader.read_float32()
-        active = reader.read_bool()
-        position = reader.read_vector3()
-        velocity = reader.read_vector3()
-        return cls(t=t, active=active, position=position, velocity=velocity)
+        t, active, px, py, pz, vx, vy, vz = reader.unpack_struct(
+            _KF_POOLED_PROJECTILE
+        )
+        return cls(
+            t=t, active=active != 0, position=(px, py, pz), velocity=(vx, vy, vz)
+        )
+
+    @classmethod
+    def from_record(cls, record: Tuple[Any, ...]) -> "PooledProjectileKeyframe":
+        t, active, position, velocity = record
+        return cls(
+            t=t,
+            active=active != 0,
+            position=tuple(position.tolist()),
+            velocity=tuple(velocity.tolist()),
+        )
 
 
 CUSTOM_KEYFRAME_READERS = {
@@ -294,6 +482,12 @@ CUSTOM_KEYFRAME_READERS = {
     "VTOLVR.ReplaySystem.VTRPooledProjectile+PooledProjectileKeyframe": PooledProjectileKeyframe.from_reader,
 }
 
+# Fixed-size custom keyframes read in bulk as packed record arrays.
+CUSTOM_KEYFRAME_RECORDS = {
+    "LockingRadar+RadarLockKeyframe": RadarLockKeyframe,
+    "VTOLVR.ReplaySystem.VTRPooledProjectile+PooledProjectileKeyframe": PooledProjectileKeyframe,
+}
+
 CUSTOM_METADATA_READERS = {
     "LockingRadar+RadarLockReplayMetadata": RadarLockMetadata.from_reader,
     "RadarJammer+ReplayMetadata": RadarJammerMetadata.from_reader,
@@ -307,7 +501,139 @@ class CustomTrackData:
     keyframe_type: str
     metadata_type: str
     metadata: Any
-    keyframes: List[Any]
+    # A list of keyframe objects, or a structured array of records for the
+    # types in CUSTOM_KEYFRAME_RECORDS.
+    keyframes: Any
+
+    def as_keyframes(self) -> Iterator[Any]:
+        if not isinstance(self.keyframes, np.ndarray):
+            yield from self.keyframes
+            return
+        keyframe_cls = CUSTOM_KEYFRAME_RECORDS[self.keyframe_type]
+        for record in self.keyframes.tolist():
+            yield keyframe_cls.from_record(record)
+
+
+@dataclass
+class MotionTrackArray:
+    """
+    Struct-of-arrays storage for a motion track's keyframes:
+    t float32[N], position float32[N, 3], velocity float32[N, 3],
+    rotation_int int32[N].
+    """
+
+    t: np.ndarray
+    position: np.ndarray
+    velocity: np.ndarray
+    rotation_int: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.t)
+
+    @classmethod
+    def empty(cls, count: int) -> "MotionTrackArray":
+        return cls(
+            t=np.empty((count,), dtype=np.float32),
+            position=np.empty((count, 3), dtype=np.float32),
+            velocity=np.empty((count, 3), dtype=np.float32),
+            rotation_int=np.empty((count,), dtype=np.int32),
+        )
+
+    def as_keyframes(self) -> Iterator[MotionKeyframe]:
+        for t, position, velocity, rotation in zip(
+            self.t.tolist(),
+            self.position.tolist(),
+            self.velocity.tolist(),
+            self.rotation_int.tolist(),
+        ):
+            yield MotionKeyframe(
+                t=t,
+                position=tuple(position),
+                velocity=tuple(velocity),
+                rotation_int=rotation,
+            )
+
+
+def _integrate_deltas(
+    first: Any, deltas: Optional[np.ndarray], count: int, dtype: Any
+) -> np.ndarray:
+    # Accumulate at double width so long tracks do not drift, then narrow.
+    wide = np.float64 if np.dtype(dtype).kind == "f" else np.int64
+    out = np.empty((count,) + np.shape(first), dtype=wide)
+    out[0] = first
+    out[1:] = 0 if deltas is None else deltas
+    return np.cumsum(out, axis=0, out=out).astype(dtype)
+
+
+def _parse_motion_deltas(
+    buf: np.ndarray,
+    offset: int,
+    count: int,
+    t: np.ndarray,
+    position: np.ndarray,
+    velocity: np.ndarray,
+    rotation: np.ndarray,
+) -> int:
+    """
+    Integrate delta keyframes 1..count-1 from a uint8 buffer into the output
+    arrays, whose row 0 already holds the full keyframe. Compiled with numba
+    when available. Returns the offset past the last keyframe, or -1 if the
+    buffer ends early.
+    """
+    size = buf.shape[0]
+    # Reinterpret 4 copied bytes as float32/int32 (little-endian host).
+    scratch = np.empty(4, dtype=np.uint8)
+    as_f32 = scratch.view(np.float32)
+    as_i32 = scratch.view(np.int32)
+
+    acc_t = np.float64(t[0])
+    pos = np.empty(3, dtype=np.float64)
+    vel = np.empty(3, dtype=np.float64)
+    for axis in range(3):
+        pos[axis] = position[0, axis]
+        vel[axis] = velocity[0, axis]
+    rot = np.int64(rotation[0])
+
+    for idx in range(1, count):
+        if offset + 5 > size:
+            return -1
+        for k in range(4):
+            scratch[k] = buf[offset + k]
+        acc_t += as_f32[0]
+        flags = int(buf[offset + 4])
+        offset += 5
+        need = 12 * (flags & 0b001) + 6 * (flags & 0b010) + (flags & 0b100)
+        if offset + need > size:
+            return -1
+        if flags & 0b001:
+            for axis in range(3):
+                for k in range(4):
+                    scratch[k] = buf[offset + k]
+                pos[axis] += as_f32[0]
+                offset += 4
+        if flags & 0b010:
+            for axis in range(3):
+                for k in range(4):
+                    scratch[k] = buf[offset + k]
+                vel[axis] += as_f32[0]
+                offset += 4
+        if flags & 0b100:
+            for k in range(4):
+                scratch[k] = buf[offset + k]
+            rot += as_i32[0]
+            offset += 4
+
+        t[idx] = acc_t
+        for axis in range(3):
+            position[idx, axis] = pos[axis]
+            velocity[idx, axis] = vel[axis]
+        rotation[idx] = rot
+    return offset
+
+
+_parse_motion_deltas_jit = (
+    njit(cache=True)(_parse_motion_deltas) if njit is not None else None
+)
 
 
 @dataclass
@@ -315,7 +641,7 @@ class MotionTrackData:
     entity_id: int
     entity_type: int
     metadata: Optional[TrackMetadata]
-    keyframes: List[MotionKeyframe]
+    keyframes: MotionTrackArray
 
 
 @dataclass
@@ -338,9 +664,50 @@ class ReplayData:
     entities: List[ReplayEntity]
 
 
+# Record fields stored as u1 flags that export as JSON booleans.
+_JSON_BOOL_FIELDS = frozenset({"active"})
+
+
+def _json_tree(obj: Any, *, keep_arrays: bool) -> Any:
+    """
+    Project replay data onto JSON-ready dicts and lists without the deep copy
+    dataclasses.asdict makes. Structured arrays become per-field columns;
+    other arrays are kept as arrays when ``keep_arrays`` (orjson serializes them
+    natively) or converted with tolist(). Both give the same JSON numbers.
+    """
+    if isinstance(obj, np.ndarray):
+        if obj.dtype.names:
+            return {
+                name: _json_tree(
+                    obj[name] != 0 if name in _JSON_BOOL_FIELDS else obj[name],
+                    keep_arrays=keep_arrays,
+                )
+                for name in obj.dtype.names
+            }
+        if not keep_arrays:
+            return obj.tolist()
+        # Widen float32 so orjson prints the same digits as tolist() does.
+        if obj.dtype == np.float32:
+            return obj.astype(np.float64)
+        return np.ascontiguousarray(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return {
+            key: _json_tree(value, keep_arrays=keep_arrays)
+            for key, value in obj.__dict__.items()
+        }
+    if isinstance(obj, list):
+        return [_json_tree(value, keep_arrays=keep_arrays) for value in obj]
+    if isinstance(obj, dict):
+        return {
+            key: _json_tree(value, keep_arrays=keep_arrays)
+            for key, value in obj.items()
+        }
+    return obj
+
+
 class VTRDeserializer:
-    def __init__(self, data: bytes) -> None:
-        self.reader = BufferReader(data)
+    def __init__(self, data: bytes | BufferReader) -> None:
+        self.reader = data if isinstance(data, BufferReader) else BufferReader(data)
 
     def deserialize(self) -> ReplayData:
         version = self.reader.read_int32()
@@ -371,17 +738,9 @@ class VTRDeserializer:
                 TrackMetadata.from_reader(self.reader) if has_metadata > 0 else None
             )
             keyframe_count = self.reader.read_int32()
-            keyframes: List[MotionKeyframe] = []
-            prev: Optional[MotionKeyframe] = None
-            for idx in range(keyframe_count):
-                if idx == 0:
-                    kf = MotionKeyframe.full(self.reader)
-                else:
-                    if prev is None:
-                        raise RuntimeError("Missing previous keyframe")
-                    kf = MotionKeyframe.delta(self.reader, prev)
-                keyframes.append(kf)
-                prev = kf
+            keyframes = self._read_uniform_motion_keyframes(keyframe_count)
+            if keyframes is None:
+                keyframes = self._read_mixed_motion_keyframes(keyframe_count)
             tracks.append(
                 MotionTrackData(
                     entity_id=entity_id,
@@ -392,6 +751,107 @@ class VTRDeserializer:
             )
         return tracks
 
+    def _read_mixed_motion_keyframes(self, count: int) -> MotionTrackArray:
+        count = max(count, 0)
+        keyframes = MotionTrackArray.empty(count)
+        if count == 0:
+            return keyframes
+        t, px, py, pz, vx, vy, vz, rot = self.reader.unpack_struct(_KF_FULL)
+        keyframes.t[0] = t
+        keyframes.position[0] = (px, py, pz)
+        keyframes.velocity[0] = (vx, vy, vz)
+        keyframes.rotation_int[0] = rot
+
+        if count > 1 and _parse_motion_deltas_jit is not None:
+            while True:
+                end = _parse_motion_deltas_jit(
+                    np.frombuffer(self.reader._buffer, dtype=np.uint8),
+                    self.reader._offset,
+                    count,
+                    keyframes.t,
+                    keyframes.position,
+                    keyframes.velocity,
+                    keyframes.rotation_int,
+                )
+                if end >= 0:
+                    break
+                # The track runs past the buffered data: grow the window, retry.
+                available = len(self.reader._buffer) - self.reader._offset
+                self.reader.ensure(2 * available + 1)
+                if len(self.reader._buffer) - self.reader._offset <= available:
+                    raise EOFError("Read past end of buffer")
+            self.reader._offset = end
+            return keyframes
+
+        for idx in range(1, count):
+            dt, dpx, dpy, dpz, dvx, dvy, dvz, drot = _read_motion_delta(self.reader)
+            t += dt
+            px += dpx
+            py += dpy
+            pz += dpz
+            vx += dvx
+            vy += dvy
+            vz += dvz
+            rot += drot
+            keyframes.t[idx] = t
+            keyframes.position[idx] = (px, py, pz)
+            keyframes.velocity[idx] = (vx, vy, vz)
+            keyframes.rotation_int[idx] = rot
+        return keyframes
+
+    def _read_uniform_motion_keyframes(
+        self, count: int
+    ) -> Optional[MotionTrackArray]:
+        """
+        Bulk-decode a motion track whose delta keyframes all share the same flags.
+        The deltas then form a packed record array that is integrated with cumsum.
+        Returns None without consuming input when the per-frame path is needed.
+        """
+        if count < 2:
+            return None
+        if not self.reader.ensure(_KF_FULL.size + 5):
+            return None
+        flags = self.reader._buffer[self.reader._offset + _KF_FULL.size + 4]
+        dtype = _MOTION_DELTA_DTYPES[flags & 0b111]
+        if not self.reader.ensure(_KF_FULL.size + dtype.itemsize * (count - 1)):
+            return None
+        buffer = self.reader._buffer
+        start = self.reader._offset
+        delta_start = start + _KF_FULL.size
+        end = delta_start + dtype.itemsize * (count - 1)
+        # Every record sits at its predicted offset only if all flags match.
+        deltas = np.frombuffer(
+            buffer, dtype=dtype, count=count - 1, offset=delta_start
+        )
+        if not np.all(deltas["flags"] == flags):
+            return None
+
+        t, px, py, pz, vx, vy, vz, rotation = _KF_FULL.unpack_from(buffer, start)
+        names = dtype.names or ()
+        keyframes = MotionTrackArray(
+            t=_integrate_deltas(t, deltas["dt"], count, np.float32),
+            position=_integrate_deltas(
+                (px, py, pz),
+                deltas["position"] if "position" in names else None,
+                count,
+                np.float32,
+            ),
+            velocity=_integrate_deltas(
+                (vx, vy, vz),
+                deltas["velocity"] if "velocity" in names else None,
+                count,
+                np.float32,
+            ),
+            rotation_int=_integrate_deltas(
+                rotation,
+                deltas["rotation"] if "rotation" in names else None,
+                count,
+                np.int32,
+            ),
+        )
+        self.reader._offset = end
+        return keyframes
+
     def _read_custom_tracks(self) -> List[CustomTrackData]:
         count = self.reader.read_int32()
         tracks: List[CustomTrackData] = []
@@ -411,7 +871,11 @@ class VTRDeserializer:
                     f"Unknown custom keyframe type: {keyframe_type}"
                 )
             kf_count = self.reader.read_int32()
-            keyframes = [keyframe_reader(self.reader) for _ in range(kf_count)]
+            record_cls = CUSTOM_KEYFRAME_RECORDS.get(keyframe_type)
+            if record_cls is not None:
+                keyframes = self.reader.read_records(record_cls.record_dtype, kf_count)
+            else:
+                keyframes = [keyframe_reader(self.reader) for _ in range(kf_count)]
             tracks.append(
                 CustomTrackData(
                     track_id=track_id,
@@ -435,6 +899,67 @@ class VTRDeserializer:
         return EventTrackData(keyframes=keyframes)
 
 
+def _gaussian_kernel_1d(sigma: float, truncate: float = 4.0) -> np.ndarray:
+    radius = int(truncate * sigma + 0.5)
+    x = np.arange(-radius, radius + 1, dtype=np.float64)
+    kernel = np.exp(-0.5 * (x / sigma) ** 2)
+    return (kernel / kernel.sum()).astype(np.float32)
+
+
+def _fft_gaussian_blur(height: np.ndarray, sigma: float) -> np.ndarray:
+    """
+    Separable Gaussian blur via FFT convolution, O(N log N) regardless of
+    sigma. Edges are mirrored to match gaussian_filter's default "reflect".
+    """
+    kernel = _gaussian_kernel_1d(sigma)
+    radius = kernel.shape[0] // 2
+    padded = np.pad(height, ((radius, radius), (0, 0)), mode="symmetric")
+    height = fftconvolve(padded, kernel[:, None], mode="valid")
+    padded = np.pad(height, ((0, 0), (radius, radius)), mode="symmetric")
+    height = fftconvolve(padded, kernel[None, :], mode="valid")
+    return height.astype(np.float32, copy=False)
+
+
+def _color_ramp(
+    values: np.ndarray, knots: np.ndarray, colors: np.ndarray
+) -> np.ndarray:
+    """Piecewise-linear RGB ramp; values outside the knots clamp to the ends."""
+    out = np.empty((values.shape[0], 3), dtype=np.float32)
+    for channel in range(3):
+        out[:, channel] = np.interp(values, knots, colors[:, channel])
+    return out
+
+
+def _hillshade_kernel(
+    gx: np.ndarray,
+    gy: np.ndarray,
+    azimuth: float,
+    altitude: float,
+    out: np.ndarray,
+) -> None:
+    """
+    Fused slope/aspect/shading pass: reads each gradient sample once and
+    writes the unnormalized hillshade into ``out``.
+    """
+    sin_alt = np.sin(altitude)
+    cos_alt = np.cos(altitude)
+    rows, cols = gx.shape
+    for i in prange(rows):
+        for j in range(cols):
+            x = gx[i, j]
+            y = gy[i, j]
+            slope = np.pi / 2.0 - np.arctan(np.sqrt(x * x + y * y))
+            aspect = np.arctan2(-x, y)
+            out[i, j] = sin_alt * np.sin(slope) + cos_alt * np.cos(slope) * np.cos(
+                azimuth - aspect
+            )
+
+
+_hillshade_kernel_jit = (
+    njit(parallel=True, cache=True)(_hillshade_kernel) if njit is not None else None
+)
+
+
 class ReplayToolkit:
     """Utility class for PNGb Caesar decode and .vtr parsing."""
 
@@ -455,25 +980,21 @@ class ReplayToolkit:
         input_path = Path(input_path)
         data = input_path.read_bytes()
 
-        shifts = [shift] if shift is not None else list(range(256))
-        found_shift = None
-        png_bytes = None
+        arr = np.frombuffer(data, dtype=np.uint8)
 
-        for s in shifts:
-            decoded = bytes(((b - s) & 0xFF) for b in data)
-            idx = decoded.find(self.PNG_MAGIC)
-            if idx == -1:
-                if shift is not None:
-                    break
-                continue
-            if not search_shift and shift is None:
-                continue
-            png_bytes = decoded[idx:]
-            found_shift = s
-            break
-
-        if png_bytes is None or found_shift is None:
+        idx, found_shift = -1, None
+        if shift is not None:
+            # Only the header needs encoding; the payload is decoded on a hit.
+            encoded_magic = bytes(((b + shift) & 0xFF) for b in self.PNG_MAGIC)
+            idx = data.find(encoded_magic)
+            if idx != -1:
+                found_shift = shift
+        elif search_shift:
+            idx, found_shift = self._search_png_shift(arr)
+
+        if found_shift is None:
             raise ValueError("Failed to locate PNG header. Check shift or input file.")
+        png_bytes = (arr[idx:] - np.uint8(found_shift & 0xFF)).tobytes()
 
         if output_path is None:
             output_path = input_path.with_suffix(f".shift{found_shift}.png")
@@ -485,30 +1006,81 @@ class ReplayToolkit:
 
         return output_path, found_shift
 
+    def _search_png_shift(self, arr: np.ndarray) -> Tuple[int, Optional[int]]:
+        """
+        Find the smallest shift whose encoded PNG header occurs in ``arr``, and
+        its first offset. A Caesar shift leaves the difference between adjacent
+        bytes unchanged, so a single scan for the header's difference signature
+        finds it under all 256 shifts at once.
+        """
+        signature = np.diff(np.frombuffer(self.PNG_MAGIC, dtype=np.uint8)).tobytes()
+        diffs = np.diff(arr).tobytes()
+        best_idx, best_shift = -1, None
+        pos = diffs.find(signature)
+        while pos != -1:
+            s = (int(arr[pos]) - self.PNG_MAGIC[0]) & 0xFF
+            if best_shift is None or s < best_shift:
+                best_idx, best_shift = pos, s
+                if s == 0:
+                    break
+            pos = diffs.find(signature, pos + 1)
+        return best_idx, best_shift
+
     def decompress_vtr(self, payload: bytes) -> bytes:
         try:
             return lz4.frame.decompress(payload)
         except LZ4FrameError:
-            target = max(len(payload) * 255, 4096)
+            # LZ4 cannot expand data by more than 255:1, so that bounds any size.
+            limit = max(len(payload) * 255, 4096)
+            # Blocks written with store_size=True carry their uncompressed size.
+            if len(payload) >= 4:
+                (size,) = _S_U32.unpack_from(payload)
+                if 0 < size <= min(limit, _LZ4_BLOCK_MAX_SIZE):
+                    try:
+                        out = lz4_block_decompress(
+                            memoryview(payload)[4:], uncompressed_size=size
+                        )
+                    except LZ4BlockError:
+                        out = None
+                    # A short result means the prefix was not a real size header.
+                    if out is not None and len(out) == size:
+                        return out
+            target = min(max(len(payload) * 4, 1 << 20), limit)
             while True:
                 try:
                     return lz4_block_decompress(payload, uncompressed_size=target)
-                except LZ4BlockError as exc:
-                    if "Output buffer is too small" in str(exc):
-                        target *= 2
-                        continue
-                    raise
+                except LZ4BlockError:
+                    if target >= limit:
+                        raise
+                    target = min(target * 2, limit)
 
     def load_vtr(self, path: str | Path) -> ReplayData:
         path = Path(path)
+        with path.open("rb") as fh:
+            magic = fh.read(len(LZ4_FRAME_MAGIC))
+        if magic == LZ4_FRAME_MAGIC:
+            # Decompress while parsing so neither the compressed file nor the
+            # whole decompressed replay has to sit in memory at once.
+            with lz4.frame.open(path, "rb") as stream:
+                parser = VTRDeserializer(StreamBufferReader(stream))
+                return parser.deserialize()
         compressed = path.read_bytes()
         decompressed = self.decompress_vtr(compressed)
         parser = VTRDeserializer(decompressed)
         return parser.deserialize()
 
     def replay_to_json(self, replay: ReplayData) -> str:
+        if orjson is not None:
+            return orjson.dumps(
+                _json_tree(replay, keep_arrays=True),
+                option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY,
+                default=str,
+            ).decode("utf-8")
         return json.dumps(
-            dataclasses.asdict(replay), ensure_ascii=False, indent=2, default=str
+            _json_tree(replay, keep_arrays=False),
+            ensure_ascii=False,
+            indent=2,
+            default=str,
         )
 
     def save_replay_json(self, replay: ReplayData, output_path: str | Path) -> Path:
@@ -519,29 +1091,53 @@ class ReplayToolkit:
     def load_heightmap(
         self, path: str | Path, *, smooth_sigma: float = 0.0
     ) -> np.ndarray:
-        img = Image.open(path).convert("RGB")
-        arr = np.array(img).astype(np.float32)
-        height = arr[..., 0] / 255.0
-        if smooth_sigma > 0 and gaussian_filter is not None:
+        """
+        Load the R channel of a heightmap as float32 in [0, 1], optionally blurred.
+        Results are cached per (path, mtime, smooth_sigma) and returned read-only;
+        copy the array before modifying it.
+        """
+        path = Path(path)
+        key = (str(path.resolve()), path.stat().st_mtime_ns, float(smooth_sigma))
+        height = _HEIGHTMAP_CACHE.get(key)
+        if height is not None:
+            _HEIGHTMAP_CACHE.move_to_end(key)
+            return height
+
+        # Only the R channel carries height; decode it alone as a single band.
+        img = Image.open(path)
+        if img.mode in ("RGB", "RGBA"):
+            band = img.getchannel("R")
+        elif img.mode == "L":
+            band = img
+        else:
+            band = img.convert("RGB").getchannel("R")
+        height = np.asarray(band, dtype=np.uint8).astype(np.float32)
+        height /= np.float32(255.0)
+        if smooth_sigma > _FFT_BLUR_MIN_SIGMA and fftconvolve is not None:
+            height = _fft_gaussian_blur(height, smooth_sigma)
+        elif smooth_sigma > 0 and gaussian_filter is not None:
             height = gaussian_filter(height, sigma=smooth_sigma)
+
+        height.flags.writeable = False
+        _HEIGHTMAP_CACHE[key] = height
+        while len(_HEIGHTMAP_CACHE) > _HEIGHTMAP_CACHE_SIZE:
+            _HEIGHTMAP_CACHE.popitem(last=False)
         return height
 
     def detect_coast_side(
         self, height: np.ndarray, *, sea_level: float
     ) -> Tuple[str, Dict[str, float]]:
-        water = height <= sea_level
+        # Only the border rows/columns matter; don't threshold the whole raster.
         ratios = {
-            "North": float(water[0, :].mean()),
-            "South": float(water[-1, :].mean()),
-            "West": float(water[:, 0].mean()),
-            "East": float(water[:, -1].mean()),
+            "North": float((height[0, :] <= sea_level).mean()),
+            "South": float((height[-1, :] <= sea_level).mean()),
+            "West": float((height[:, 0] <= sea_level).mean()),
+            "East": float((height[:, -1] <= sea_level).mean()),
         }
         side = max(ratios, key=ratios.get)
         return side, ratios
 
-    def rotate_to_west(
-        self, height: np.ndarray, *, sea_level: float
-    ) -> Tuple[np.ndarray, int]:
+    def _west_rotation(self, height: np.ndarray, *, sea_level: float) -> int:
         actual_side, _ratios = self.detect_coast_side(height, sea_level=sea_level)
         side_to_k = {
             "West": 0,
@@ -549,8 +1145,13 @@ class ReplayToolkit:
             "East": 2,
             "South": 3,
         }
-        k = side_to_k.get(actual_side, 0)
-        return np.rot90(height, k=k), k
+        return side_to_k.get(actual_side, 0)
+
+    def rotate_to_west(
+        self, height: np.ndarray, *, sea_level: float
+    ) -> Tuple[np.ndarray, int]:
+        k = self._west_rotation(height, sea_level=sea_level)
+        return np.ascontiguousarray(np.rot90(height, k=k)), k
 
     def compute_hillshade(
         self,
@@ -560,17 +1161,23 @@ class ReplayToolkit:
         azimuth_deg: float = 315.0,
         altitude_deg: float = 45.0,
     ) -> np.ndarray:
-        gy, gx = np.gradient(height * z_scale)
-        slope = np.pi / 2.0 - np.arctan(np.sqrt(gx * gx + gy * gy))
-        aspect = np.arctan2(-gx, gy)
-
-        az = np.deg2rad(azimuth_deg)
-        alt = np.deg2rad(altitude_deg)
-
-        shaded = np.sin(alt) * np.sin(slope) + np.cos(alt) * np.cos(slope) * np.cos(
-            az - aspect
-        )
-        shaded = (shaded - shaded.min()) / (shaded.max() - shaded.min() + 1e-6)
+        gy, gx = np.gradient(height.astype(np.float32, copy=False) * z_scale)
+
+        az = np.float32(np.deg2rad(azimuth_deg))
+        alt = np.float32(np.deg2rad(altitude_deg))
+
+        if _hillshade_kernel_jit is not None:
+            shaded = np.empty(gx.shape, dtype=np.float32)
+            _hillshade_kernel_jit(gx, gy, az, alt, shaded)
+        else:
+            slope = np.float32(np.pi / 2.0) - np.arctan(np.sqrt(gx * gx + gy * gy))
+            aspect = np.arctan2(-gx, gy)
+            shaded = np.sin(alt) * np.sin(slope) + np.cos(alt) * np.cos(
+                slope
+            ) * np.cos(az - aspect)
+        lo = shaded.min()
+        shaded -= lo
+        shaded /= shaded.max() + 1e-6
         return shaded
 
     def make_color_map(
@@ -580,49 +1187,33 @@ class ReplayToolkit:
         *,
         sea_level: float,
     ) -> np.ndarray:
-        h = height
-        hs = hillshade
-        rgb = np.zeros((h.shape[0], h.shape[1], 3), dtype=np.float32)
-
-        water_color_deep = np.array([15, 30, 70], dtype=np.float32)
-        water_color_shallow = np.array([30, 60, 110], dtype=np.float32)
-        lowland_color = np.array([30, 80, 30], dtype=np.float32)
-        midland_color = np.array([80, 120, 50], dtype=np.float32)
-        highland_color = np.array([110, 90, 60], dtype=np.float32)
-        peak_color = np.array([210, 210, 210], dtype=np.float32)
-
-        water_mask = h <= sea_level
+        h = height.astype(np.float32, copy=False)
+        hs = hillshade.astype(np.float32, copy=False)
+        sea = np.float32(sea_level)
+        rgb = np.empty((h.shape[0], h.shape[1], 3), dtype=np.float32)
+
+        # Deep -> shallow water.
+        water_colors = np.array([[15, 30, 70], [30, 60, 110]], dtype=np.float32)
+        # Lowland -> midland -> highland -> peak.
+        land_knots = np.array([0.0, 0.3, 0.7, 1.0], dtype=np.float32)
+        land_colors = np.array(
+            [[30, 80, 30], [80, 120, 50], [110, 90, 60], [210, 210, 210]],
+            dtype=np.float32,
+        )
+
+        water_mask = h <= sea
         land_mask = ~water_mask
 
         if water_mask.any():
-            h_water = np.clip(h[water_mask] / max(sea_level, 1e-6), 0.0, 1.0)
-            rgb[water_mask] = (
-                water_color_deep[None, :] * (1 - h_water[:, None])
-                + water_color_shallow[None, :] * h_water[:, None]
-            )
+            water_knots = np.array([0.0, max(sea, 1e-6)], dtype=np.float32)
+            rgb[water_mask] = _color_ramp(h[water_mask], water_knots, water_colors)
 
         if land_mask.any():
             h_land = h[land_mask]
-            h_norm = (h_land - sea_level) / (h_land.max() - sea_level + 1e-6)
-            h_norm = np.clip(h_norm, 0.0, 1.0)
+            h_norm = (h_land - sea) / (h_land.max() - sea + np.float32(1e-6))
+            rgb[land_mask] = _color_ramp(h_norm, land_knots, land_colors)
 
-            c = np.zeros((h_land.shape[0], 3), dtype=np.float32)
-
-            m1 = h_norm <= 0.3
-            t1 = h_norm[m1] / 0.3
-            c[m1] = lowland_color * (1 - t1[:, None]) + midland_color * t1[:, None]
-
-            m2 = (h_norm > 0.3) & (h_norm <= 0.7)
-            t2 = (h_norm[m2] - 0.3) / 0.4
-            c[m2] = midland_color * (1 - t2[:, None]) + highland_color * t2[:, None]
-
-            m3 = h_norm > 0.7
-            t3 = (h_norm[m3] - 0.7) / 0.3
-            c[m3] = highland_color * (1 - t3[:, None]) + peak_color * t3[:, None]
-
-            rgb[land_mask] = c
-
-        brightness = 0.5 + hs * 0.7
+        brightness = np.float32(0.5) + hs * np.float32(0.7)
         rgb *= brightness[..., None]
         return np.clip(rgb, 0, 255).astype(np.uint8)
 
@@ -638,20 +1229,34 @@ class ReplayToolkit:
         z_scale: float = 3.0,
         azimuth_deg: float = 315.0,
         altitude_deg: float = 45.0,
+        compress_level: int = 1,
     ) -> Path:
+        """
+        Render a shaded 2D map PNG from a heightmap. ``compress_level`` is the
+        zlib level (0-9); the fast default suits previews, use 9 for exports.
+        """
         height = self.load_heightmap(heightmap_path, smooth_sigma=smooth_sigma)
 
+        k = 0
         if edge_mode == "Coast" and coast_side == "West":
-            height, _k = self.rotate_to_west(height, sea_level=sea_level)
+            k = self._west_rotation(height, sea_level=sea_level)
 
+        # Shade and colour the unrotated raster, then rotate the uint8 result.
+        # Turning the light by 90 degrees per quarter turn keeps the shading
+        # identical to shading the rotated heightmap.
         hillshade = self.compute_hillshade(
             height,
             z_scale=z_scale,
-            azimuth_deg=azimuth_deg,
+            azimuth_deg=azimuth_deg + 90.0 * k,
             altitude_deg=altitude_deg,
         )
         rgb = self.make_color_map(height, hillshade, sea_level=sea_level)
+        if k:
+            rgb = np.rot90(rgb, k=k)
+        rgb = np.ascontiguousarray(rgb)
 
         output_path = Path(output_path)
-        Image.fromarray(rgb, mode="RGB").save(output_path)
+        Image.fromarray(rgb, mode="RGB").save(
+            output_path, optimize=False, compress_level=compress_level
+        )
         return output_path